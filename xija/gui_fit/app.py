@@ -5,9 +5,10 @@ import time
 
 from PyQt5 import QtCore, QtWidgets, QtGui
 
-from itertools import count
 import argparse
+import bisect
 import fnmatch
+import functools
 
 import re
 import json
@@ -16,6 +17,7 @@ import numpy as np
 from pathlib import Path
 
 from cxotime import CxoTime
+from Chandra.Time import secs2date
 
 import pyyaks.context as pyc
 
@@ -30,12 +32,80 @@ from .fitter import FitWorker, fit_logger
 from .plots import PlotsBox, HistogramWindow
 
 from collections import OrderedDict
+from contextlib import contextmanager
 
 from cheta.units import F_to_C
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 gui_config = {}
 
 
+def load_json(filename):
+    """Load a JSON file, using the faster orjson parser if it is available.
+
+    Falls back to the standard library parser for input that orjson rejects
+    but ``json`` accepts, e.g. NaN values.
+    """
+    with open(filename, 'rb') as fh:
+        contents = fh.read()
+    if orjson is not None:
+        try:
+            return orjson.loads(contents)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(contents)
+
+
+def _compile_fmt(fmt):
+    """Convert a parameter format like ``"{:.4g}"`` into an equivalent
+    %-style formatting function, which avoids re-parsing the format spec on
+    every call.  Falls back to ``fmt.format`` if there is no direct %-style
+    equivalent.
+    """
+    match = re.fullmatch(r'\{0?:([+ #0]*\d*(?:\.\d+)?[eEfFgG])\}', fmt)
+    if match is None:
+        return fmt.format
+    return ('%' + match.group(1)).__mod__
+
+
+@functools.lru_cache(maxsize=None)
+def _get_plot_attrs(cls):
+    """Get the sorted names of ``plot_*`` methods defined on component class
+    ``cls`` or its bases (the same names ``dir()`` would give)."""
+    attrs = {attr for klass in cls.__mro__ for attr in vars(klass)
+             if attr.startswith('plot_')}
+    return sorted(attrs)
+
+
+@functools.lru_cache(maxsize=256)
+def _globs_to_regex(globs):
+    """Compile a tuple of UNIX-style globs into a single regex that matches
+    any of them.  Cached since the same freeze/thaw commands are often
+    repeated during a session.
+    """
+    return re.compile('|'.join('(?:{})'.format(fnmatch.translate(x))
+                               for x in globs))
+
+
+def _find_pos(times, xline, last_pos):
+    """Get the index of the first element of sorted ``times`` that is >=
+    ``xline``, the same as ``np.searchsorted(times, xline)``.
+
+    The line usually moves only a few samples between calls, so first look
+    within 8 samples of the previous position ``last_pos``.
+    """
+    n_times = len(times)
+    lo = max(last_pos - 8, 0)
+    hi = min(last_pos + 8, n_times)
+    if (lo == 0 or times[lo - 1] < xline) and (hi == n_times or xline <= times[hi]):
+        return bisect.bisect_left(times, xline, lo, hi)
+    return int(np.searchsorted(times, xline))
+
+
 def raise_error_box(win_title, err_msg):
     msg_box = QtWidgets.QMessageBox()
     msg_box.setIcon(QtWidgets.QMessageBox.Critical)
@@ -73,10 +143,32 @@ class FormattedTelemData:
 
     @property
     def dates(self):
+        """Dates as a fixed-width bytes array (decode to get str values),
+        which takes 1/4 the memory of the unicode array from CxoTime.
+        """
         if self._dates is None:
-            self._dates = CxoTime(self.times).date
+            self._dates = CxoTime(self.times).date.astype('S21')
         return self._dates
 
+    def value_at(self, item, pos):
+        """Get the value of data ``item`` at time index ``pos``.
+
+        This reads directly from the underlying data and model arrays and so
+        avoids computing the full residuals array to get one value.
+        """
+        name = self.data_names[item]
+        data = self.telem_data[self.data_basenames[item]]
+        if name.endswith("_model"):
+            return data.mvals[pos]
+        elif name.endswith("_resid"):
+            # Residuals are zeroed for masked times, as in Node.resids
+            for i0, i1 in data.model.mask_times_indices:
+                if i0 <= pos < i1:
+                    return 0.0
+            return data.dvals[pos] - data.mvals[pos]
+        else:
+            return data.dvals[pos]
+
     def __getitem__(self, item):
         name = self.data_names[item]
         basenm = self.data_basenames[item]
@@ -89,6 +181,24 @@ class FormattedTelemData:
         return val
 
 
+class LazyDates:
+    """Date strings for an array of times (CXC secs) that are only computed
+    when an element is requested, with the most recent ones cached.
+    """
+    def __init__(self, secs):
+        self.secs = secs
+        self._get_date = functools.lru_cache(maxsize=1024)(self._calc_date)
+
+    def _calc_date(self, idx):
+        return secs2date(self.secs[idx])
+
+    def __len__(self):
+        return len(self.secs)
+
+    def __getitem__(self, idx):
+        return self._get_date(idx)
+
+
 class FiltersWindow(QtWidgets.QMainWindow):
     def __init__(self, model, main_window):
         super(FiltersWindow, self).__init__()
@@ -225,8 +335,8 @@ class WriteTableWindow(QtWidgets.QMainWindow):
         self.ftd = self.mw.fmt_telem_data
         self.write_list = self.ftd.data_names
 
-        self.start_date = self.ftd.dates[0]
-        self.stop_date = self.ftd.dates[-1]
+        self.start_date = self.ftd.dates[0].decode('ascii')
+        self.stop_date = self.ftd.dates[-1].decode('ascii')
 
         main_box = QtWidgets.QVBoxLayout()
 
@@ -339,7 +449,8 @@ class WriteTableWindow(QtWidgets.QMainWindow):
                 ts = CxoTime([self.start_date, self.stop_date]).secs
                 ts[-1] += 1.0 # a buffer to make sure we grab the last point
                 istart, istop = np.searchsorted(self.ftd.times, ts)
-                c = Column(self.ftd.dates[istart:istop], name="date", format="{0}")
+                dates = np.char.decode(self.ftd.dates[istart:istop], 'ascii')
+                c = Column(dates, name="date", format="{0}")
                 t.add_column(c)
                 for i, key in enumerate(self.ftd):
                     if i in checked:
@@ -456,19 +567,31 @@ class LineDataWindow(QtWidgets.QMainWindow):
             self.table[row, 0] = QtWidgets.QLabel(name)
             self.table[row, 1] = QtWidgets.QLabel("")
 
+        # Value labels by row, so the cursor update does no table lookups
+        self.value_labels = [self.table.cell(row, 1) for row in range(self.nrows)]
+
+        self._fmt_funcs = [_compile_fmt(fmt) for fmt in self.ftd.formats]
+
+        self._last_pos = 0
+
         self.update_data()
 
         self.box.addWidget(self.table.table)
 
+    def get_pos(self, xline):
+        """Get the index of the first time >= ``xline`` (like np.searchsorted)."""
+        pos = _find_pos(self.plots_box.pd_times, xline, self._last_pos)
+        self._last_pos = pos
+        return pos
+
     def update_data(self):
-        pos = np.searchsorted(self.plots_box.pd_times, 
-                              self.plots_box.xline)
-        date = self.main_window.dates[pos]
-        self.table[0, 1].setText(date)
-        for row in range(1, self.nrows):
-            val = self.ftd[row-1]
-            fmt = self.ftd.formats[row-1]
-            self.table[row, 1].setText(fmt.format(val[pos]))
+        pos = self.get_pos(self.plots_box.xline)
+        labels = self.value_labels
+        value_at = self.ftd.value_at
+        with self.table.batch_update():
+            labels[0].setText(self.main_window.dates[pos])
+            for row, fmt in enumerate(self._fmt_funcs, start=1):
+                labels[row].setText(fmt(value_at(row-1, pos)))
 
 
 class WidgetTable(dict):
@@ -483,6 +606,8 @@ class WidgetTable(dict):
             self.colnames = ['col{}'.format(i + 1) for i in range(n_cols)]
         self.n_rows = n_rows
         self.show_header = show_header
+        self._colname_idx = {name: i for i, name in enumerate(self.colnames)}
+        self._cells = [[None] * self.n_cols for _ in range(self.n_rows)]
 
         self.table = QtWidgets.QTableWidget(self.n_rows, self.n_cols)
 
@@ -511,8 +636,29 @@ class WidgetTable(dict):
     def __setitem__(self, rowcol, widget):
         row, col = rowcol
         dict.__setitem__(self, rowcol, widget)
+        self._cells[row][col] = widget
         self.table.setCellWidget(row, col, widget)
 
+    def cell(self, row, col):
+        """Fast access to the widget at (row, col) for use in update loops.
+        ``col`` can be a numeric index or the column name.
+        """
+        if isinstance(col, str):
+            col = self._colname_idx[col]
+        return self._cells[row][col]
+
+    @contextmanager
+    def batch_update(self):
+        """Context manager that disables repainting of the table while many
+        cell widgets are changed, then repaints it once at the end.
+        """
+        self.table.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.viewport().update()
+
 
 class Panel:
     def __init__(self, orient='h'):
@@ -558,18 +704,19 @@ class PanelText(QtWidgets.QLineEdit):
         self.attr = attr
         self.slider = slider
         self.params_panel = params_panel
+        self.fmt = params_panel.fmt_funcs[row]
 
     def _bounds_check(self):
         msg = None
         if self.par.val < self.par.min:
             msg = "Attempted to set parameter value below minimum. Setting to min value."
             self.par.val = self.par.min
-            self.params_panel.params_table[self.row, 2].setText(self.par.fmt.format(self.par.val))
+            self.params_panel.set_displayed(self.row, self.par.val)
         if self.par.val > self.par.max:
             msg = "Attempted to set parameter value below maximum. Setting to max value."
             self.par.val = self.par.max
-            self.setText(self.par.fmt.format(self.par.val))
-            self.params_panel.params_table[self.row, 2].setText(self.par.fmt.format(self.par.val))
+            self.setText(self.fmt(self.par.val))
+            self.params_panel.set_displayed(self.row, self.par.val)
         return msg
 
     def par_attr_changed(self):
@@ -585,6 +732,8 @@ class PanelText(QtWidgets.QLineEdit):
         msg = self._bounds_check()
         if msg is not None:
             print(msg)
+        elif self.attr == 'val':
+            self.params_panel.set_displayed(self.row, self.par.val)
         self.slider.update_slider_val(val, self.attr)
         self.params_panel.plots_panel.update_plots()
 
@@ -668,7 +817,7 @@ class PanelSlider(QtWidgets.QSlider):
     def slider_moved(self):
         val = self.get_value_from_step()
         setattr(self.par, "val", val)
-        self.params_panel.params_table[self.row, 2].setText(self.par.fmt.format(val))
+        self.params_panel.set_displayed(self.row, val)
         if self.update_plots:
             self.params_panel.plots_panel.update_plots()
 
@@ -685,55 +834,97 @@ class ParamsPanel(Panel):
                                    show_header=True)
 
         self.params_dict = OrderedDict()
+        self.fmt_funcs = [_compile_fmt(par.fmt) for par in self.model.pars]
 
-        for row, par in zip(count(), self.model.pars):
+        # Suspend repaints while the (possibly many) rows are built
+        with params_table.batch_update():
+            for row, par in enumerate(self.model.pars):
+                fmt = self.fmt_funcs[row]
 
-            # Thawed (i.e. fit the parameter)
-            frozen = params_table[row, 0] = PanelCheckBox(par, self.plots_panel.main_window)
-            frozen.setChecked(not par.frozen)
-            frozen.stateChanged.connect(frozen.frozen_toggled)
+                # Thawed (i.e. fit the parameter)
+                frozen = params_table[row, 0] = PanelCheckBox(par, self.plots_panel.main_window)
+                frozen.setChecked(not par.frozen)
 
-            # par full name
-            params_table[row, 1] = QtWidgets.QLabel(par.full_name)
+                # par full name
+                params_table[row, 1] = QtWidgets.QLabel(par.full_name)
 
-            # Slider
-            slider = PanelSlider(self, par, row)
-            params_table[row, 4] = slider
-            slider.sliderMoved.connect(slider.slider_moved)
+                # Slider
+                slider = PanelSlider(self, par, row)
+                params_table[row, 4] = slider
+
+                # Value
+                entry = params_table[row, 2] = PanelText(self, row, par, 'val', slider)
+                entry.setText(fmt(par.val))
 
-            # Value
-            entry = params_table[row, 2] = PanelText(self, row, par, 'val', slider)
-            entry.setText(par.fmt.format(par.val))
-            entry.returnPressed.connect(entry.par_attr_changed)
+                # Min of slider
+                entry = params_table[row, 3] = PanelText(self, row, par, 'min', slider)
+                entry.setText(fmt(par.min))
 
-            # Min of slider
-            entry = params_table[row, 3] = PanelText(self, row, par, 'min', slider)
-            entry.setText(par.fmt.format(par.min))
-            entry.returnPressed.connect(entry.par_attr_changed)
+                # Max of slider
+                entry = params_table[row, 5] = PanelText(self, row, par, 'max', slider)
+                entry.setText(fmt(par.max))
 
-            # Max of slider
-            entry = params_table[row, 5] = PanelText(self, row, par, 'max', slider)
-            entry.setText(par.fmt.format(par.max))
-            entry.returnPressed.connect(entry.par_attr_changed)
+                self.params_dict[par.full_name] = PanelParam(params_table.cell(row, 2),
+                                                             params_table.cell(row, 3),
+                                                             params_table.cell(row, 5))
 
-            self.params_dict[par.full_name] = PanelParam(params_table[row, 2],
-                                                         params_table[row, 3],
-                                                         params_table[row, 5])
+        # Connect signals in a separate pass once all widgets are built
+        for row in range(len(self.model.pars)):
+            frozen = params_table.cell(row, 0)
+            frozen.stateChanged.connect(frozen.frozen_toggled)
+            slider = params_table.cell(row, 4)
+            slider.sliderMoved.connect(slider.slider_moved)
+            for col in (2, 3, 5):
+                entry = params_table.cell(row, col)
+                entry.returnPressed.connect(entry.par_attr_changed)
 
         self.pack_start(params_table.table)
         self.params_table = params_table
 
-    def update(self):
-        for row, par in enumerate(self.model.pars):
-            val_label = self.params_table[row, 2]
-            par_val_text = par.fmt.format(par.val)
-            if str(val_label.text) != par_val_text:
-                val_label.setText(par_val_text)
-                # Change the slider value but block the signal to update the plot
-                slider = self.params_table[row, 4]
-                slider.block_plotting(True)
-                slider.set_step_from_value(par.val)
-                slider.block_plotting(False)
+        # Parameter values as of the last update() along with the widgets
+        # that need to change when a value changes.
+        self._last_vals = np.array([par.val for par in self.model.pars],
+                                   dtype=np.float64)
+        self._last_version = None
+        self._val_labels = [params_table.cell(row, 2)
+                            for row in range(len(self.model.pars))]
+        self._sliders = [params_table.cell(row, 4)
+                         for row in range(len(self.model.pars))]
+
+    def set_displayed(self, row, val):
+        """Show ``val`` as the value of parameter ``row`` and record it as the
+        displayed value, so update() only touches the row if it changes again.
+        """
+        self._val_labels[row].setText(self.fmt_funcs[row](val))
+        self._last_vals[row] = val
+
+    def update(self, version=None):
+        """Update the value and slider widgets for parameters that changed.
+
+        ``version`` is the parameter version from a fit worker message.  If
+        it matches the version from the previous call then the parameters
+        have not changed and nothing is done.
+        """
+        if version is not None and version == self._last_version:
+            return
+        self._last_version = version
+
+        pars = self.model.pars
+        vals = np.fromiter((par.val for par in pars), dtype=np.float64,
+                           count=len(pars))
+        with self.params_table.batch_update():
+            for row in np.flatnonzero(vals != self._last_vals):
+                par = pars[row]
+                val_label = self._val_labels[row]
+                par_val_text = self.fmt_funcs[row](par.val)
+                if val_label.text() != par_val_text:
+                    val_label.setText(par_val_text)
+                    # Change the slider value but block the signal to update the plot
+                    slider = self._sliders[row]
+                    slider.block_plotting(True)
+                    slider.set_step_from_value(par.val)
+                    slider.block_plotting(False)
+        self._last_vals = vals
 
 
 class ControlButtonsPanel(Panel):
@@ -807,8 +998,7 @@ class ControlButtonsPanel(Panel):
 
         plot_names = ['{} {}'.format(comp.name, attr[5:])
                       for comp in self.model.comps
-                      for attr in dir(comp)
-                      if attr.startswith('plot_')]
+                      for attr in _get_plot_attrs(type(comp))]
 
         self.plot_names = plot_names
         for plot_name in plot_names:
@@ -900,7 +1090,15 @@ class MainWindow:
 
         self.cbp = mlp.control_buttons_panel
         self.cbp.fit_button.clicked.connect(self.fit_worker.start)
-        self.cbp.fit_button.clicked.connect(self.fit_monitor)
+        if os.name == "nt":
+            # QSocketNotifier only supports sockets on Windows, so poll the
+            # fit pipe with a timer while fitting.
+            self.fit_notifier = None
+            self.cbp.fit_button.clicked.connect(self.fit_monitor)
+        else:
+            self.fit_notifier = QtCore.QSocketNotifier(
+                self.fit_worker.parent_pipe.fileno(), QtCore.QSocketNotifier.Read)
+            self.fit_notifier.activated.connect(self.fit_monitor)
         self.cbp.stop_button.clicked.connect(self.fit_worker.terminate)
         self.cbp.save_button.clicked.connect(self.save_model_file)
         self.cbp.write_table_button.clicked.connect(self.write_table)
@@ -917,7 +1115,7 @@ class MainWindow:
         self.ftp.freeze_entry.returnPressed.connect(self.freeze_activated)
         self.ftp.thaw_entry.returnPressed.connect(self.thaw_activated)
 
-        self.dates = CxoTime(self.model.times).date
+        self.dates = LazyDates(self.model.times)
 
         self.telem_data = {k: v for k, v in self.model.comp.items()
                            if isinstance(v, TelemData)}
@@ -1015,12 +1213,26 @@ class MainWindow:
         pp.add_plot_box(plotname)
 
     def fit_monitor(self, *args):
+        """Read messages from the fit worker and update the GUI. This is
+        called when the fit pipe has data to read or, on Windows, on a timer
+        while the fit is running.  Either way the GUI is updated at most once
+        every 200 msec during a fit, since each update recalculates the model
+        and redraws the plots.
+        """
+        if self.fit_notifier is not None:
+            # Avoid re-entry while messages are processed
+            self.fit_notifier.setEnabled(False)
+
         msg = None
         fit_stopped = False
-        while self.fit_worker.parent_pipe.poll():
-            # Keep reading messages until there are no more or until getting
-            # a message indicating fit is stopped.
+        n_msgs = 0
+        while n_msgs < 64 and self.fit_worker.parent_pipe.poll():
+            # Keep reading messages until there are no more, until getting
+            # a message indicating fit is stopped, or until a batch has been
+            # read (any remaining are picked up on the next call).  Only the
+            # last message is used.
             msg = self.fit_worker.parent_pipe.recv()
+            n_msgs += 1
             fit_stopped = msg['status'] in ('terminated', 'finished')
             if fit_stopped:
                 self.fit_worker.fit_process.join()
@@ -1033,13 +1245,22 @@ class MainWindow:
             # Update the fit_worker model parameters and then the corresponding
             # params table widget.
             self.fit_worker.model.parvals = msg['parvals']
-            self.main_right_panel.params_panel.update()
+            # Versions restart with each fit, so do a full update at the end
+            version = None if fit_stopped else msg.get('version')
+            self.main_right_panel.params_panel.update(version=version)
             self.main_left_panel.plots_box.update_plots()
             if self.show_line:
                 self.line_data_window.update_data()
 
-        # If fit has not stopped then set another timeout 200 msec from now
-        if not fit_stopped:
+        if self.fit_notifier is not None:
+            if fit_stopped:
+                self.fit_notifier.setEnabled(True)
+            else:
+                # Listen for fit messages again 200 msec from now
+                QtCore.QTimer.singleShot(
+                    200, functools.partial(self.fit_notifier.setEnabled, True))
+        elif not fit_stopped:
+            # If fit has not stopped then set another timeout 200 msec from now
             QtCore.QTimer.singleShot(200, self.fit_monitor)
 
     def freeze_activated(self):
@@ -1062,18 +1283,24 @@ class MainWindow:
             return
         vals = command.split()
         if cmd_type in ('freeze', 'thaw'):
-            par_regexes = [fnmatch.translate(x) for x in vals]
+            par_regex = _globs_to_regex(tuple(vals))
             params_table = self.main_right_panel.params_panel.params_table
+            matched = False
             for row, par in enumerate(self.model.pars):
-                for par_regex in par_regexes:
-                    if re.match(par_regex, par.full_name):
-                         checkbutton = params_table[row, 0]
-                         checkbutton.setChecked(cmd_type == 'thaw')
-                         par.frozen = cmd_type != 'thaw'
-                         self.set_checksum()
-                         self.set_title()
-                         if self.model_info_window is not None:
-                            self.model_info_window.update_checksum()
+                if par_regex.match(par.full_name):
+                    # Block frozen_toggled so the checksum and title are
+                    # refreshed once below rather than for every parameter
+                    checkbutton = params_table.cell(row, 0)
+                    checkbutton.blockSignals(True)
+                    checkbutton.setChecked(cmd_type == 'thaw')
+                    checkbutton.blockSignals(False)
+                    par.frozen = cmd_type != 'thaw'
+                    matched = True
+            if matched:
+                self.set_checksum()
+                self.set_title()
+                if self.model_info_window is not None:
+                    self.model_info_window.update_checksum()
         widget.setText('')
 
     def set_title(self):
@@ -1180,7 +1407,7 @@ def main():
                 logger.removeHandler(h)
 
     if opt.filename.endswith(".json"):
-        model_spec = json.load(open(opt.filename, 'r'))
+        model_spec = load_json(opt.filename)
     elif opt.filename in get_xija_model_names():
         model_spec, model_version = get_xija_model_spec(opt.filename)
     else:
@@ -1211,13 +1438,22 @@ def main():
         # string literal into the corresponding Python object.
         set_data_vals[comp_name] = ast.literal_eval(val)
 
+    model_comps = model.comp
+    missing = []
     for comp_name, val in set_data_vals.items():
-        model.comp[comp_name].set_data(val)
+        comp = model_comps.get(comp_name)
+        if comp is None:
+            missing.append(comp_name)
+        else:
+            comp.set_data(val)
+    if missing:
+        raise KeyError("cannot set data for unknown model component(s): {}"
+                       .format(', '.join(missing)))
 
     model.make()
 
     if opt.inherit_from:
-        inherit_spec = json.load(open(opt.inherit_from, 'r'))
+        inherit_spec = load_json(opt.inherit_from)
         inherit_pars = {par['full_name']: par for par in inherit_spec['pars']}
         for par in model.pars:
             if par.full_name in inherit_pars:
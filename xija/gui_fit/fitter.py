@@ -48,6 +48,9 @@ class CalcStat(object):
         self.min_parvals = self.model.parvals
         self.niter = 0
         self.maxiter = maxiter
+        # Incremented each time the parameter values change
+        self.version = 0
+        self.last_parvals = None
 
     def __call__(self, _data, _model, staterror=None, syserror=None, weight=None):
         """Calculate fit statistic for the xija model.  The args _data and _model
@@ -61,9 +64,15 @@ class CalcStat(object):
             self.min_fit_stat = fit_stat
             self.min_parvals = self.model.parvals
 
+        parvals = np.array(self.model.parvals)
+        if self.last_parvals is None or np.any(parvals != self.last_parvals):
+            self.version += 1
+            self.last_parvals = parvals
+
         self.message = {'status': 'fitting',
                         'time': time.time(),
-                        'parvals': self.model.parvals,
+                        'version': self.version,
+                        'parvals': parvals,
                         'fit_stat': fit_stat,
                         'min_parvals': self.min_parvals,
                         'min_fit_stat': self.min_fit_stat}
@@ -0,0 +1,90 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import json
+
+import numpy as np
+import pytest
+
+app = pytest.importorskip('xija.gui_fit.app')
+
+VALS = [0, 3, 1.0, 0.5, -1.5, -123456.789, 1e-9, 1e20,
+        float('nan'), float('inf'), float('-inf')]
+
+
+@pytest.mark.parametrize('fmt', ['{:.4g}', '{0:.4f}', '{:+.3e}', '{: .2f}',
+                                 '{:#.4g}', '{:10.3g}', '{:08.2f}', '{:.3E}',
+                                 '{:-8.2f}', '{:<8.2f}', '{:,.2f}', '{}'])
+@pytest.mark.parametrize('val', VALS)
+def test_compile_fmt(fmt, val):
+    assert app._compile_fmt(fmt)(val) == fmt.format(val)
+
+
+@pytest.mark.parametrize('fmt', ['{:-8.2f}', '{:<8.2f}', '{:,.2f}', '{}', '{:.4}'])
+def test_compile_fmt_fallback(fmt):
+    assert app._compile_fmt(fmt) == fmt.format
+
+
+TIMES = np.array([0.0, 1.0, 2.0, 2.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0,
+                  9.0, 10.0, 11.0, 12.0, 13.0, 14.0, 15.0, 15.0, 16.0,
+                  17.0, 18.0, 19.0, 20.0, 21.0, 22.0, 23.0, 24.0, 25.0])
+
+
+@pytest.mark.parametrize('xline', [-5.0, 0.0, 0.5, 2.0, 2.5, 7.0, 14.9, 15.0,
+                                   15.5, 24.5, 25.0, 30.0])
+@pytest.mark.parametrize('last_pos', [0, 1, 3, 10, 17, 20, 28, 29])
+def test_find_pos(xline, last_pos):
+    """Cover times before the start and after the end, exact hits, duplicate
+    times, and moves within or beyond the +/-8 sample window."""
+    assert app._find_pos(TIMES, xline, last_pos) == np.searchsorted(TIMES, xline)
+
+
+def test_find_pos_random():
+    rng = np.random.default_rng(0)
+    times = np.sort(rng.uniform(0, 100, 1000).round(1))
+    last_pos = 0
+    for xline in np.concatenate([rng.uniform(-10, 110, 200),
+                                 np.arange(-1, 101, 0.05)]):
+        pos = app._find_pos(times, xline, last_pos)
+        assert pos == np.searchsorted(times, xline)
+        last_pos = pos
+
+
+def test_globs_to_regex():
+    regex = app._globs_to_regex(('solarheat*_P*', 'heatsink__T'))
+    assert regex.match('solarheat__tephin_P_45')
+    assert regex.match('heatsink__T')
+    assert not regex.match('heatsink__T_extra')
+    assert not regex.match('coupling__tephin__tcylaft6__tau')
+    assert not app._globs_to_regex(('a*',)).match('xa')
+    # Same tuple of globs returns the cached compiled regex
+    assert app._globs_to_regex(('a*',)) is app._globs_to_regex(('a*',))
+
+
+def test_lazy_dates():
+    from cxotime import CxoTime
+    secs = CxoTime(['2020:001:00:00:00.000', '2020:002:12:34:56.789',
+                    '2021:365:23:59:59.000']).secs
+    dates = app.LazyDates(secs)
+    assert len(dates) == 3
+    assert dates[0] == '2020:001:00:00:00.000'
+    assert dates[1] == '2020:002:12:34:56.789'
+    assert dates[-1] == '2021:365:23:59:59.000'
+    assert dates[-2] == dates[1]
+
+
+@pytest.mark.parametrize('text', [
+    '{"name": "test", "pars": [{"val": 1.5, "frozen": true}], "comps": []}',
+    '{"name": "test", "pars": [{"val": NaN, "frozen": false}], "comps": []}',
+])
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_load_json(tmp_path, monkeypatch, text, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(app, 'orjson', None)
+    elif app.orjson is None:
+        pytest.skip('orjson not available')
+    filename = tmp_path / 'spec.json'
+    filename.write_text(text)
+    with open(filename) as fh:
+        expected = json.load(fh)
+    # Compare serialized forms since NaN != NaN
+    assert (json.dumps(app.load_json(filename), sort_keys=True)
+            == json.dumps(expected, sort_keys=True))